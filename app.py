@@ -1,13 +1,18 @@
 from flask import Flask, render_template, request, redirect, url_for, jsonify
 from datamanager.json_data_manager import JSONDataManager
-from moviweb_app.datamanager.data_exceptions import UserNotFoundException, MovieNotFoundException, MovieExistsException
+from datamanager.movie_index import MovieIndex
+from datamanager.data_exceptions import UserNotFoundException, MovieNotFoundException, MovieExistsException
 import os
 
 # Define the path to the data.json file
 data_json_path = os.path.join(os.path.dirname(__file__), 'data', 'data.json')
+# Define the path to the local movie index, built by build_movie_index.py
+movie_index_path = os.path.join(os.path.dirname(__file__), 'data', 'movies.db')
 
 app = Flask(__name__)
-data_manager = JSONDataManager(data_json_path)  # Use the appropriate path to your JSON file
+# Without a built index, movies are looked up with the OMDB API only
+movie_index = MovieIndex(movie_index_path) if os.path.exists(movie_index_path) else None
+data_manager = JSONDataManager(data_json_path, movie_index)  # Use the appropriate path to your JSON file
 
 
 @app.route('/')
@@ -70,6 +75,19 @@ def add_movie(user_id):
     return render_template('add_movie.html', user_id=user_id)
 
 
+@app.route('/movies/autocomplete')
+def autocomplete_movies():
+    prefix = request.args.get('q', '')
+    if movie_index is None:
+        return jsonify([])
+    suggestions = [
+        {'id': movie['id'], 'title': movie['title'], 'year': movie['year'],
+         'label': f"{movie['title']} ({movie['year']})"}
+        for movie in movie_index.autocomplete(prefix)
+    ]
+    return jsonify(suggestions)
+
+
 @app.route('/users/<int:user_id>/update_movie/<movie_id>', methods=['GET', 'POST'])
 def update_movie(user_id, movie_id):
     if request.method == 'POST':
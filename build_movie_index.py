@@ -0,0 +1,33 @@
+import argparse
+import os
+import time
+from datamanager.movie_index import MovieIndex
+
+# Define the default path to the movie index, next to data.json
+movie_index_path = os.path.join(os.path.dirname(__file__), 'data', 'movies.db')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk-load the IMDb TSV datasets (https://datasets.imdbws.com/) into the local movie index.")
+    parser.add_argument('basics', help="path to title.basics.tsv or title.basics.tsv.gz")
+    parser.add_argument('ratings', help="path to title.ratings.tsv or title.ratings.tsv.gz")
+    parser.add_argument('--crew', help="path to title.crew.tsv(.gz), used together with --names to resolve directors")
+    parser.add_argument('--names', help="path to name.basics.tsv(.gz), used together with --crew to resolve directors")
+    parser.add_argument('--index', default=movie_index_path, help="path to the SQLite index file to fill")
+    args = parser.parse_args()
+
+    if bool(args.crew) != bool(args.names):
+        parser.error("--crew and --names must be given together")
+
+    start = time.perf_counter()
+    movie_index = MovieIndex(args.index)
+    try:
+        count = movie_index.load_imdb_datasets(args.basics, args.ratings, args.crew, args.names)
+    finally:
+        movie_index.close()
+    print(f"Indexed {count} movies into '{args.index}' in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,23 @@
 from .data_manager_interface import DataManagerInterface
 from .data_exceptions import UserNotFoundException, MovieNotFoundException, MovieExistsException
 from .movie_api import MovieAPI
+from .movie_index import CONFIDENT_THRESHOLD, split_title_year
 import json
 import os
+import requests
 
 
 class JSONDataManager(DataManagerInterface):
-    def __init__(self, filepath):
+    def __init__(self, filepath, movie_index=None):
         """
         Initialize the JSONDataManager.
 
         Args:
              filepath (str): The path to the JSON file.
+             movie_index (MovieIndex, optional): Local title index consulted before the OMDB API.
         """
         self.filepath = filepath
+        self.movie_index = movie_index
         if not os.path.exists(self.filepath):
             self._create_default_json_file()
             # print(f"Storage file '{self.filepath}' created successfully.")
@@ -157,7 +161,7 @@ class JSONDataManager(DataManagerInterface):
 
         Raises:
             UserNotFoundException: If the user with the specified user_id is not found.
-            MovieNotFoundException: If the movie with the specified title is not found in the OMDB database.
+            MovieNotFoundException: If the movie with the specified title is not found locally or in the OMDB database.
             MovieExistsException: If the movie already exists in the user's collection.
 
         Returns:
@@ -169,19 +173,65 @@ class JSONDataManager(DataManagerInterface):
 
         user_movies = self.get_user_movies(user_id)
 
-        # Step 2: Fetch information about the movie from the OMDB API
-        movie_info = MovieAPI.fetch_movie_info(title)
-        if movie_info.get('Response') == 'False':
-            # Movie not found in the OMDB database
-            raise MovieNotFoundException(f"Movie '{title}' not found.")
+        # Step 2: Look the movie up in the local index, falling back to the OMDB API on a miss
+        movie = self.find_movie(title)
 
         # Step 3: Add the movie to the user's movie collection
-        movie_id = movie_info.get('imdbID')
-        if movie_id in user_movies:
+        if movie['id'] in user_movies:
             raise MovieExistsException(f"Movie '{title}' already exists in user's collection.")
 
-        user_movies[movie_id] = {
-            'id': movie_id,
+        user_movies[movie['id']] = movie
+
+        # Save the updated data to the file
+        self._save_data(self.data)
+
+    def find_movie(self, title):
+        """
+        Resolve a title to a movie record, consulting the local index before the OMDB API.
+
+        An exact local match wins, then a fuzzy local match that is both very close and unambiguous,
+        then an exact OMDB match. A looser fuzzy local match is only used when the OMDB API does not
+        know the title or cannot be reached. Movies fetched from the OMDB API are added to the local
+        index so later lookups stay local.
+
+        Args:
+            title (str): The title of the movie, optionally followed by its year, e.g. 'Heat (1995)'.
+
+        Raises:
+            MovieNotFoundException: If the movie is found neither in the local index nor in the OMDB database.
+
+        Returns:
+            dict: The movie record with id, title, director, year, rating and poster_url.
+        """
+        bare_title, year = split_title_year(title)
+
+        timeout = None
+        if self.movie_index is not None:
+            movie = (self.movie_index.find(bare_title, year)
+                     or self.movie_index.find_similar(bare_title, year, threshold=CONFIDENT_THRESHOLD))
+            if movie is not None:
+                return movie
+            timeout = MovieAPI.FALLBACK_TIMEOUT
+
+        api_error = None
+        try:
+            movie_info = MovieAPI.fetch_movie_info(bare_title, year, timeout)
+        except requests.RequestException as e:
+            print(f"Error fetching movie '{title}' from the OMDB API: {e}")
+            api_error = e
+            movie_info = {'Response': 'False'}
+
+        if movie_info.get('Response') == 'False':
+            # Movie not found in the OMDB database, try a misspelled title in the local index
+            movie = self.movie_index.find_similar(bare_title, year) if self.movie_index is not None else None
+            if movie is not None:
+                return movie
+            if api_error is not None:
+                raise MovieNotFoundException(f"Movie '{title}' not found locally and the OMDB API is unavailable.")
+            raise MovieNotFoundException(f"Movie '{title}' not found.")
+
+        movie = {
+            'id': movie_info.get('imdbID'),
             'title': movie_info.get('Title'),
             'director': movie_info.get('Director'),
             'year': int(movie_info.get('Year')),
@@ -189,8 +239,9 @@ class JSONDataManager(DataManagerInterface):
             'poster_url': movie_info.get('Poster', '')
         }
 
-        # Save the updated data to the file
-        self._save_data(self.data)
+        if self.movie_index is not None:
+            self.movie_index.add_movie(movie)
+        return movie
 
     def delete_movie(self, user_id, movie_id):
         """
@@ -4,24 +4,33 @@ import requests
 class MovieAPI:
     """ A class for interacting with the OMDb API to fetch movie information. """
     OMDB_API_KEY = '4b3bad41'
+    OMDB_URL = 'http://www.omdbapi.com/'
+    TIMEOUT = 5
+    # Used when the local movie index is consulted first, so a slow API does not hold up a lookup for long
+    FALLBACK_TIMEOUT = 1.5
 
     @staticmethod
-    def fetch_movie_info(title):
+    def fetch_movie_info(title, year=None, timeout=None):
         """
         Fetches movie information from the OMDb API.
 
         Args:
             title (str): The title of the movie to fetch information for.
+            year (int, optional): The release year used to disambiguate titles.
+            timeout (float, optional): Seconds to wait for the API, defaults to TIMEOUT.
 
         Returns:
             dict: A dictionary containing information about the movie.
 
         Raises:
-            Exception: If there was an error fetching movie information.
+            requests.RequestException: If the OMDb API could not be reached or returned an error status.
         """
-        url = f'http://www.omdbapi.com/?apikey={MovieAPI.OMDB_API_KEY}&t={title}'
-        response = requests.get(url)
+        params = {'apikey': MovieAPI.OMDB_API_KEY, 't': title}
+        if year is not None:
+            params['y'] = year
+        response = requests.get(MovieAPI.OMDB_URL, params=params, timeout=timeout or MovieAPI.TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
-            raise Exception(f"Failed to fetch movie information. Status code: {response.status_code}")
+            raise requests.HTTPError(f"Failed to fetch movie information. Status code: {response.status_code}",
+                                     response=response)
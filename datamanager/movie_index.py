@@ -0,0 +1,458 @@
+import csv
+import gzip
+import re
+import sqlite3
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+
+
+# Titles scoring below this similarity are not considered a match for add_movie
+FUZZY_THRESHOLD = 0.6
+
+# Fuzzy matches at least this similar are trusted without asking the OMDb API first
+CONFIDENT_THRESHOLD = 0.9
+
+# Fuzzy matches are refused when the runner-up title scores within this margin of the best one
+AMBIGUITY_MARGIN = 0.05
+
+# Number of rarest query trigrams used to collect fuzzy candidates
+CANDIDATE_GRAMS = 8
+
+# Trigram postings read per fuzzy lookup, common trigrams beyond the rarest one are skipped past this budget
+CANDIDATE_POSTINGS = 20000
+
+# Maximum number of candidates rescored per fuzzy lookup
+CANDIDATE_LIMIT = 200
+
+# Suggestions for prefixes up to this length are precomputed, longer prefixes match few enough titles to scan
+SUGGESTION_PREFIX_LENGTH = 4
+
+# Number of precomputed suggestions per prefix
+SUGGESTION_LIMIT = 10
+
+# IMDb title types that are kept when ingesting the datasets
+INDEXED_TITLE_TYPES = ('movie', 'tvMovie')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    norm_title TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    director TEXT NOT NULL,
+    rating REAL NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0,
+    poster_url TEXT NOT NULL DEFAULT ''
+);
+DROP INDEX IF EXISTS idx_movies_norm_title;
+CREATE INDEX IF NOT EXISTS idx_movies_norm_title_votes ON movies (norm_title, votes);
+CREATE TABLE IF NOT EXISTS title_trigrams (
+    gram TEXT NOT NULL,
+    movie_id TEXT NOT NULL,
+    PRIMARY KEY (gram, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trigram_stats (
+    gram TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS prefix_suggestions (
+    prefix TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    movie_id TEXT NOT NULL,
+    PRIMARY KEY (prefix, rank)
+) WITHOUT ROWID;
+"""
+
+TITLE_YEAR_PATTERN = re.compile(r'^(?P<title>.*\S)\s*\((?P<year>\d{4})\)\s*$')
+
+
+def normalize_title(title):
+    """
+    Normalize a title for matching: strip accents, lowercase and collapse punctuation into single spaces.
+
+    Letters of any script are kept, so non-Latin titles get keys of their own.
+
+    Args:
+        title (str): The title to normalize.
+
+    Returns:
+        str: The normalized title.
+    """
+    decomposed = unicodedata.normalize('NFKD', title)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[\W_]+', ' ', stripped.lower()).split())
+
+
+def trigrams(norm_title):
+    """
+    Return the set of character trigrams of a normalized title.
+
+    Args:
+        norm_title (str): A title already passed through normalize_title.
+
+    Returns:
+        set: The trigrams of the padded title.
+    """
+    padded = f'  {norm_title} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def split_title_year(text):
+    """
+    Split an optional trailing release year off a title, e.g. 'Heat (1995)'.
+
+    Args:
+        text (str): The title as typed by the user.
+
+    Returns:
+        tuple: The bare title and the year as an int, or None if no year was given.
+    """
+    match = TITLE_YEAR_PATTERN.match(text.strip())
+    if match:
+        return match.group('title'), int(match.group('year'))
+    return text.strip(), None
+
+
+def _open_tsv(path):
+    """Open an IMDb TSV dataset file, transparently handling gzip compression."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _read_tsv(path):
+    """Yield the rows of an IMDb TSV dataset file as dictionaries."""
+    with _open_tsv(path) as f:
+        yield from csv.DictReader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+
+
+class MovieIndex:
+    """ A local SQLite title index used to resolve movies without calling the OMDb API. """
+
+    def __init__(self, filepath):
+        """
+        Initialize the MovieIndex, creating an empty index if the file does not exist.
+
+        Args:
+            filepath (str): The path to the SQLite index file.
+        """
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filepath, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        # Serve reads straight from the page cache of the memory-mapped file
+        self._connection.execute('PRAGMA mmap_size = 268435456')
+        self._connection.executescript(SCHEMA)
+        # Indexes built before the suggestions table existed get it filled on first open
+        with self._connection:
+            if (self._connection.execute('SELECT 1 FROM movies LIMIT 1').fetchone()
+                    and not self._connection.execute('SELECT 1 FROM prefix_suggestions LIMIT 1').fetchone()):
+                self._rebuild_prefix_suggestions()
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._connection.close()
+
+    @staticmethod
+    def _to_movie(row):
+        """Convert a database row into a movie record in the data file format."""
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'director': row['director'],
+            'year': row['year'],
+            'rating': row['rating'],
+            'poster_url': row['poster_url']
+        }
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _fuzzy_candidates(self, norm_title, year=None):
+        """
+        Collect movies sharing the rarest trigrams of a normalized title.
+
+        The year is applied before the candidates are cut down, so it cannot drop the right movie.
+
+        Returns:
+            list: Database rows of candidate movies.
+        """
+        grams = list(trigrams(norm_title))
+        placeholders = ','.join('?' * len(grams))
+        rare_grams = []
+        postings = 0
+        for row in self._query(f'SELECT gram, df FROM trigram_stats WHERE gram IN ({placeholders}) ORDER BY df LIMIT ?',
+                               (*grams, CANDIDATE_GRAMS)):
+            if rare_grams and postings + row['df'] > CANDIDATE_POSTINGS:
+                break
+            rare_grams.append(row['gram'])
+            postings += row['df']
+        if not rare_grams:
+            return []
+
+        placeholders = ','.join('?' * len(rare_grams))
+        year_join = ''
+        params = []
+        if year is not None:
+            year_join = 'JOIN movies y ON y.id = t.movie_id AND y.year = ?'
+            params.append(year)
+        return self._query(
+            f'SELECT m.* FROM movies m JOIN ('
+            f'  SELECT t.movie_id, COUNT(*) AS hits FROM title_trigrams t {year_join}'
+            f'  WHERE t.gram IN ({placeholders}) GROUP BY t.movie_id ORDER BY hits DESC LIMIT ?'
+            f') c ON c.movie_id = m.id',
+            (*params, *rare_grams, CANDIDATE_LIMIT))
+
+    def _rank(self, title, year, threshold, prefix):
+        """
+        Score the fuzzy candidates for a title.
+
+        Returns:
+            list: (score, votes, row) tuples ordered from best to worst match.
+        """
+        norm_title = normalize_title(title)
+        if not norm_title:
+            return []
+
+        # The query is analysed once, the cheap upper bounds skip most candidates before the full ratio
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(norm_title)
+        scored = []
+        for row in self._fuzzy_candidates(norm_title, year):
+            matcher.set_seq1(row['norm_title'][:len(norm_title)] if prefix else row['norm_title'])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                scored.append((score, row['votes'], row))
+
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return scored
+
+    def search(self, title, year=None, limit=10, threshold=0.0, prefix=False):
+        """
+        Find the movies whose titles best match a possibly misspelled title.
+
+        Args:
+            title (str): The title to look for.
+            year (int, optional): Only return movies released in this year.
+            limit (int): The maximum number of movies to return.
+            threshold (float): The minimum similarity (0 to 1) a title needs to be returned.
+            prefix (bool): Compare against the beginning of each title only, for partially typed titles.
+
+        Returns:
+            list: Movie records ordered from best to worst match.
+        """
+        return [self._to_movie(row) for _, _, row in self._rank(title, year, threshold, prefix)[:limit]]
+
+    def find(self, title, year=None):
+        """
+        Resolve a title to a single movie by exact (normalized) title match, most popular first.
+
+        Args:
+            title (str): The title of the movie.
+            year (int, optional): The release year used to disambiguate titles.
+
+        Returns:
+            dict or None: The matching movie record, or None if no title matches exactly.
+        """
+        norm_title = normalize_title(title)
+        if not norm_title:
+            return None
+
+        sql = 'SELECT * FROM movies WHERE norm_title = ?'
+        params = [norm_title]
+        if year is not None:
+            sql += ' AND year = ?'
+            params.append(year)
+        rows = self._query(sql + ' ORDER BY votes DESC LIMIT 1', params)
+        return self._to_movie(rows[0]) if rows else None
+
+    def find_similar(self, title, year=None, threshold=FUZZY_THRESHOLD):
+        """
+        Resolve a possibly misspelled title to a single movie.
+
+        Movies sharing a title are resolved to the most popular one, as in find. Nothing is returned
+        when the two best distinct titles score about the same, since picking either of them would be a guess.
+
+        Args:
+            title (str): The title of the movie.
+            year (int, optional): The release year used to disambiguate titles.
+            threshold (float): The minimum similarity (0 to 1) the best title needs to be returned.
+
+        Returns:
+            dict or None: The best matching movie record, or None if no single title is close enough.
+        """
+        # Ranked rows come best first, so the first row per title is also its most voted one
+        best_per_title = {}
+        for score, _, row in self._rank(title, year, FUZZY_THRESHOLD, prefix=False):
+            best_per_title.setdefault(row['norm_title'], (score, row))
+        ranked = list(best_per_title.values())
+
+        if not ranked or ranked[0][0] < threshold:
+            return None
+        if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < AMBIGUITY_MARGIN:
+            return None
+        return self._to_movie(ranked[0][1])
+
+    def autocomplete(self, prefix, limit=10):
+        """
+        Suggest movies for a partially typed title, most popular first.
+
+        Args:
+            prefix (str): The beginning of the title.
+            limit (int): The maximum number of suggestions.
+
+        Returns:
+            list: Movie records whose titles start with the prefix, topped up with fuzzy matches.
+        """
+        norm_prefix = normalize_title(prefix)
+        if len(norm_prefix) < 2:
+            return []
+
+        if len(norm_prefix) <= SUGGESTION_PREFIX_LENGTH and limit <= SUGGESTION_LIMIT:
+            rows = self._query(
+                'SELECT m.* FROM prefix_suggestions p JOIN movies m ON m.id = p.movie_id '
+                'WHERE p.prefix = ? ORDER BY p.rank LIMIT ?',
+                (norm_prefix, limit))
+        else:
+            with self._lock:
+                rows = self._top_by_prefix(norm_prefix, limit)
+        suggestions = [self._to_movie(row) for row in rows]
+
+        if len(suggestions) < limit:
+            seen = {movie['id'] for movie in suggestions}
+            for movie in self.search(prefix, limit=limit, threshold=FUZZY_THRESHOLD, prefix=True):
+                if movie['id'] not in seen and len(suggestions) < limit:
+                    suggestions.append(movie)
+        return suggestions
+
+    def _top_by_prefix(self, norm_prefix, limit):
+        """Return the most voted movies whose normalized titles start with a prefix. The caller holds the lock."""
+        return self._connection.execute(
+            'SELECT * FROM movies WHERE norm_title >= ? AND norm_title < ? ORDER BY votes DESC, id LIMIT ?',
+            (norm_prefix, norm_prefix + '\uffff', limit)).fetchall()
+
+    def _refresh_prefix_suggestions(self, norm_title):
+        """Recompute the precomputed suggestions for the short prefixes of a title. The caller holds the lock."""
+        for length in range(2, min(len(norm_title), SUGGESTION_PREFIX_LENGTH) + 1):
+            norm_prefix = norm_title[:length]
+            rows = self._top_by_prefix(norm_prefix, SUGGESTION_LIMIT)
+            self._connection.execute('DELETE FROM prefix_suggestions WHERE prefix = ?', (norm_prefix,))
+            self._connection.executemany('INSERT INTO prefix_suggestions VALUES (?, ?, ?)',
+                                         [(norm_prefix, rank, row['id']) for rank, row in enumerate(rows)])
+
+    def _rebuild_prefix_suggestions(self):
+        """Precompute the suggestions for every short prefix from scratch. The caller holds the lock."""
+        self._connection.execute('DELETE FROM prefix_suggestions')
+        for length in range(2, SUGGESTION_PREFIX_LENGTH + 1):
+            self._connection.execute(
+                'INSERT INTO prefix_suggestions SELECT prefix, rank, id FROM ('
+                '  SELECT substr(norm_title, 1, ?) AS prefix, id, ROW_NUMBER() OVER ('
+                '    PARTITION BY substr(norm_title, 1, ?) ORDER BY votes DESC, id) - 1 AS rank'
+                '  FROM movies WHERE length(norm_title) >= ?'
+                ') WHERE rank < ?',
+                (length, length, length, SUGGESTION_LIMIT))
+
+    def _insert_movies(self, movies):
+        """Insert or update movie records and their trigrams without updating the trigram statistics."""
+        rows = []
+        gram_rows = []
+        stale_gram_rows = []
+        for movie in movies:
+            norm_title = normalize_title(movie['title'])
+            # Drop the trigrams of the previous title when a movie was renamed since the last load
+            previous = self._connection.execute('SELECT norm_title FROM movies WHERE id = ?', (movie['id'],)).fetchone()
+            if previous is not None and previous['norm_title'] != norm_title:
+                stale_gram_rows.extend((gram, movie['id']) for gram in trigrams(previous['norm_title']))
+            rows.append((movie['id'], movie['title'], norm_title, movie['year'], movie['director'],
+                         movie['rating'], movie.get('votes', 0), movie.get('poster_url', '')))
+            gram_rows.extend((gram, movie['id']) for gram in trigrams(norm_title))
+        self._connection.executemany('DELETE FROM title_trigrams WHERE gram = ? AND movie_id = ?', stale_gram_rows)
+        # Keep a poster fetched earlier from the OMDb API, the IMDb datasets do not provide one
+        self._connection.executemany(
+            'INSERT INTO movies VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET '
+            'title = excluded.title, norm_title = excluded.norm_title, year = excluded.year, '
+            'director = excluded.director, rating = excluded.rating, votes = excluded.votes, '
+            "poster_url = CASE WHEN excluded.poster_url = '' THEN poster_url ELSE excluded.poster_url END",
+            rows)
+        self._connection.executemany('INSERT OR IGNORE INTO title_trigrams VALUES (?, ?)', gram_rows)
+
+    def add_movie(self, movie):
+        """
+        Add a single movie record to the index, e.g. one fetched from the OMDb API.
+
+        Args:
+            movie (dict): A movie record with id, title, director, year, rating and poster_url.
+        """
+        with self._lock, self._connection:
+            if self._connection.execute('SELECT 1 FROM movies WHERE id = ?', (movie['id'],)).fetchone():
+                return
+            self._insert_movies([movie])
+            norm_title = normalize_title(movie['title'])
+            self._connection.executemany(
+                'INSERT INTO trigram_stats VALUES (?, 1) ON CONFLICT (gram) DO UPDATE SET df = df + 1',
+                [(gram,) for gram in trigrams(norm_title)])
+            self._refresh_prefix_suggestions(norm_title)
+
+    def load_imdb_datasets(self, basics_path, ratings_path, crew_path=None, names_path=None, batch_size=10000):
+        """
+        Bulk-load the IMDb TSV datasets (https://datasets.imdbws.com/) into the index.
+
+        Only rated movies with a known release year are indexed. Directors are resolved
+        when both the crew and the names datasets are given.
+
+        Args:
+            basics_path (str): Path to title.basics.tsv(.gz).
+            ratings_path (str): Path to title.ratings.tsv(.gz).
+            crew_path (str, optional): Path to title.crew.tsv(.gz).
+            names_path (str, optional): Path to name.basics.tsv(.gz).
+            batch_size (int): Number of movies inserted per statement batch.
+
+        Returns:
+            int: The number of movies in the index after loading.
+        """
+        ratings = {row['tconst']: (float(row['averageRating']), int(row['numVotes']))
+                   for row in _read_tsv(ratings_path)}
+
+        directors = {}
+        if crew_path and names_path:
+            crew = {row['tconst']: row['directors'].split(',') for row in _read_tsv(crew_path)
+                    if row['tconst'] in ratings and row['directors'] != '\\N'}
+            wanted = {nconst for nconsts in crew.values() for nconst in nconsts}
+            names = {row['nconst']: row['primaryName'] for row in _read_tsv(names_path)
+                     if row['nconst'] in wanted}
+            directors = {tconst: ', '.join(names[nconst] for nconst in nconsts if nconst in names)
+                         for tconst, nconsts in crew.items()}
+
+        with self._lock:
+            self._connection.execute('PRAGMA synchronous = OFF')
+            with self._connection:
+                batch = []
+                for row in _read_tsv(basics_path):
+                    if (row['titleType'] not in INDEXED_TITLE_TYPES or row['tconst'] not in ratings
+                            or row['startYear'] == '\\N'):
+                        continue
+                    rating, votes = ratings[row['tconst']]
+                    batch.append({
+                        'id': row['tconst'],
+                        'title': row['primaryTitle'],
+                        'director': directors.get(row['tconst']) or 'N/A',
+                        'year': int(row['startYear']),
+                        'rating': rating,
+                        'votes': votes
+                    })
+                    if len(batch) >= batch_size:
+                        self._insert_movies(batch)
+                        batch = []
+                self._insert_movies(batch)
+
+                self._connection.execute('DELETE FROM trigram_stats')
+                self._connection.execute(
+                    'INSERT INTO trigram_stats SELECT gram, COUNT(*) FROM title_trigrams GROUP BY gram')
+                self._rebuild_prefix_suggestions()
+            self._connection.execute('PRAGMA synchronous = FULL')
+            self._connection.execute('ANALYZE')
+            return self._connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
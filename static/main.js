@@ -45,3 +45,28 @@ document.querySelectorAll('.delete-movie').forEach(link => {
         }
     });
 });
+
+// Suggest titles from the local movie index while typing in the "Add Movie" form
+const titleInput = document.querySelector('input[list="title-suggestions"]');
+if (titleInput) {
+    const suggestions = document.getElementById('title-suggestions');
+    let debounceTimer;
+
+    titleInput.addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(() => {
+            fetch(`/movies/autocomplete?q=${encodeURIComponent(titleInput.value)}`)
+            .then(response => response.json())
+            .then(movies => {
+                // Offer "Title (Year)" so the chosen movie is resolved unambiguously
+                suggestions.innerHTML = '';
+                movies.forEach(movie => {
+                    const option = document.createElement('option');
+                    option.value = movie.label;
+                    suggestions.appendChild(option);
+                });
+            })
+            .catch(error => console.error('Error fetching suggestions:', error));
+        }, 150);
+    });
+}
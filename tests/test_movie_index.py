@@ -0,0 +1,177 @@
+import app
+import pytest
+import requests
+from datamanager.data_exceptions import MovieNotFoundException
+from datamanager.json_data_manager import JSONDataManager
+from datamanager.movie_api import MovieAPI
+from datamanager.movie_index import MovieIndex, normalize_title
+
+BASICS = [
+    ('tt0133093', 'movie', 'The Matrix', '1999'),
+    ('tt0113277', 'movie', 'Heat', '1995'),
+    ('tt0090000', 'movie', 'Heat', '1986'),
+    ('tt0034492', 'movie', 'Bambi', '1942'),
+    ('tt0211915', 'movie', 'Amélie', '2001'),
+    ('tt0046438', 'movie', '東京物語', '1953'),
+    ('tt0000001', 'short', 'Heat Wave', '1995'),
+]
+RATINGS = {'tt0133093': ('8.7', '2000000'), 'tt0113277': ('8.3', '700000'), 'tt0090000': ('5.1', '5000'),
+           'tt0034492': ('7.3', '150000'), 'tt0211915': ('8.3', '800000'), 'tt0046438': ('8.2', '70000'),
+           'tt0000001': ('6.0', '10')}
+
+OMDB_BARBIE = {'Response': 'True', 'imdbID': 'tt1517268', 'Title': 'Barbie', 'Director': 'Greta Gerwig',
+               'Year': '2023', 'imdbRating': '6.8', 'Poster': 'https://example.com/barbie.jpg'}
+
+
+def _write_tsv(path, header, rows):
+    path.write_text('\n'.join('\t'.join(row) for row in [header, *rows]) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def _load(movie_index, tmp_path, basics=BASICS, ratings=RATINGS):
+    basics_path = _write_tsv(tmp_path / 'title.basics.tsv',
+                             ('tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear',
+                              'endYear', 'runtimeMinutes', 'genres'),
+                             [(tconst, kind, title, title, '0', year, '\\N', '\\N', '\\N')
+                              for tconst, kind, title, year in basics])
+    ratings_path = _write_tsv(tmp_path / 'title.ratings.tsv', ('tconst', 'averageRating', 'numVotes'),
+                              [(tconst, *rating) for tconst, rating in ratings.items()])
+    crew_path = _write_tsv(tmp_path / 'title.crew.tsv', ('tconst', 'directors', 'writers'),
+                           [('tt0113277', 'nm0000520', '\\N')])
+    names_path = _write_tsv(tmp_path / 'name.basics.tsv', ('nconst', 'primaryName'),
+                            [('nm0000520', 'Michael Mann')])
+    return movie_index.load_imdb_datasets(basics_path, ratings_path, crew_path, names_path)
+
+
+@pytest.fixture
+def movie_index(tmp_path):
+    movie_index = MovieIndex(':memory:')
+    _load(movie_index, tmp_path)
+    yield movie_index
+    movie_index.close()
+
+
+@pytest.fixture
+def data_manager(tmp_path, movie_index):
+    return JSONDataManager(str(tmp_path / 'data.json'), movie_index)
+
+
+def _fail_omdb(title, year=None, timeout=None):
+    raise AssertionError(f"OMDb should not be called for '{title}'")
+
+
+def test_load_skips_unrated_and_non_movie_titles(movie_index):
+    assert movie_index.find('Heat Wave') is None
+    assert movie_index.find('Heat', 1995)['director'] == 'Michael Mann'
+    assert movie_index.find('The Matrix')['director'] == 'N/A'
+
+
+def test_find_exact_prefers_most_popular(movie_index):
+    assert movie_index.find('heat')['id'] == 'tt0113277'
+    assert movie_index.find('THE MATRIX!')['id'] == 'tt0133093'
+
+
+def test_find_disambiguates_by_year(movie_index):
+    assert movie_index.find('Heat', 1986)['id'] == 'tt0090000'
+    assert movie_index.find('Heat', 2020) is None
+
+
+def test_find_keeps_non_latin_titles_apart(movie_index):
+    assert normalize_title('東京物語') == '東京物語'
+    assert movie_index.find('東京物語')['id'] == 'tt0046438'
+    assert movie_index.find('Amelie')['id'] == 'tt0211915'
+    assert movie_index.find('!!!') is None
+
+
+def test_find_does_not_guess_on_miss(movie_index):
+    assert movie_index.find('Barbie') is None
+    assert movie_index.find('Heath') is None
+
+
+def test_find_similar_resolves_typos(movie_index):
+    assert movie_index.find_similar('Teh Matrx')['id'] == 'tt0133093'
+    assert movie_index.find_similar('Completely Unknown Film') is None
+
+
+def test_find_similar_resolves_typos_of_titles_shared_by_several_movies(movie_index):
+    assert movie_index.find_similar('Haet')['id'] == 'tt0113277'
+    assert movie_index.find_similar('Heatt')['id'] == 'tt0113277'
+    assert movie_index.find_similar('Haet', 1986)['id'] == 'tt0090000'
+
+
+def test_search_applies_year_before_cutting_candidates(tmp_path):
+    # The sequels share more of the rare trigrams than the wanted movie and would crowd it out
+    sequels = [(f'tt1{i:06d}', 'movie', f'The Matrix {i}', '2003') for i in range(250)]
+    basics = [('tt0133093', 'movie', 'Matrix', '1999'), *sequels]
+    movie_index = MovieIndex(':memory:')
+    _load(movie_index, tmp_path, basics, {tconst: ('7.0', '100') for tconst, *_ in basics})
+    assert movie_index.search('The Matirx', 1999)[0]['id'] == 'tt0133093'
+    movie_index.close()
+
+
+def test_reload_drops_trigrams_of_renamed_titles(movie_index, tmp_path):
+    renamed = [(tconst, kind, 'Matrix Reloaded' if tconst == 'tt0133093' else title, year)
+               for tconst, kind, title, year in BASICS]
+    _load(movie_index, tmp_path, renamed)
+    assert movie_index.find('The Matrix') is None
+    assert movie_index.search('The Matrix', threshold=0.9) == []
+
+
+def test_autocomplete_matches_prefixes(movie_index):
+    assert [movie['id'] for movie in movie_index.autocomplete('he')] == ['tt0113277', 'tt0090000']
+    assert [movie['id'] for movie in movie_index.autocomplete('the ma')] == ['tt0133093']
+    assert movie_index.autocomplete('the matirx')[0]['id'] == 'tt0133093'
+    assert movie_index.autocomplete('h') == []
+
+
+def test_find_movie_uses_index_before_omdb(data_manager, monkeypatch):
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', _fail_omdb)
+    assert data_manager.find_movie('Heat (1986)')['id'] == 'tt0090000'
+
+
+def test_find_movie_trusts_confident_fuzzy_match_without_omdb(data_manager, monkeypatch):
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', _fail_omdb)
+    assert data_manager.find_movie('The Matrixx')['id'] == 'tt0133093'
+
+
+def test_find_movie_prefers_omdb_over_fuzzy_match(data_manager, movie_index, monkeypatch):
+    timeouts = []
+
+    def fetch_barbie(title, year=None, timeout=None):
+        timeouts.append(timeout)
+        return OMDB_BARBIE
+
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', fetch_barbie)
+    assert data_manager.find_movie('Barbie')['id'] == 'tt1517268'
+    assert timeouts == [MovieAPI.FALLBACK_TIMEOUT]
+
+    # The OMDb result is cached in the index, so the next lookup stays local
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', _fail_omdb)
+    assert movie_index.find('Barbie')['poster_url'] == OMDB_BARBIE['Poster']
+    assert 'tt1517268' in [movie['id'] for movie in movie_index.autocomplete('ba')]
+
+
+def test_find_movie_falls_back_to_fuzzy_match_on_omdb_miss(data_manager, monkeypatch):
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', lambda *args, **kwargs: {'Response': 'False'})
+    assert data_manager.find_movie('Teh Matrx')['id'] == 'tt0133093'
+    with pytest.raises(MovieNotFoundException):
+        data_manager.find_movie('Completely Unknown Film')
+
+
+def test_find_movie_survives_unreachable_omdb(data_manager, monkeypatch):
+    def timeout(title, year=None, timeout=None):
+        raise requests.Timeout('OMDb timed out')
+
+    monkeypatch.setattr(MovieAPI, 'fetch_movie_info', timeout)
+    assert data_manager.find_movie('Teh Matrx')['id'] == 'tt0133093'
+    with pytest.raises(MovieNotFoundException, match='unavailable'):
+        data_manager.find_movie('Completely Unknown Film')
+
+
+def test_autocomplete_endpoint(data_manager, movie_index, monkeypatch):
+    monkeypatch.setattr(app, 'data_manager', data_manager)
+    monkeypatch.setattr(app, 'movie_index', movie_index)
+
+    response = app.app.test_client().get('/movies/autocomplete?q=heat')
+    assert response.status_code == 200
+    assert response.get_json()[0] == {'id': 'tt0113277', 'title': 'Heat', 'year': 1995, 'label': 'Heat (1995)'}